@@ -53,7 +53,8 @@ ALPACA_CREDS = {
 
 class MLTRADER(_MLTRADER):
     
-    def initialize(self, symbol: str = "SPY" , cash_at_risk: float = .5):
+    def initialize(self, symbol: str = "SPY" , cash_at_risk: float = .5, event_driven: bool = False,
+                   news_feed: str = None, sentiment_change: float = .05):
         
         """
         Initialize the trading strategy with essential parameters and settings.
@@ -65,6 +66,9 @@ class MLTRADER(_MLTRADER):
         Args:
             symbol (str): The trading symbol.
             cash_at_risk (float): The proportion of cash to risk on each trade (default is 0.5 or 50%).
+            event_driven (bool): Wake on incoming news instead of once every 24 hours (default is False).
+            news_feed (str): Path of a local news feed file to tail in event-driven mode.
+            sentiment_change (float): The change in sentiment probability that triggers the trading logic.
             
         >>> MLTRADER().backtest(
         >>> YahooBacktesting,
@@ -79,8 +83,10 @@ class MLTRADER(_MLTRADER):
         self.last_trade = None
         self.cash_at_risk = cash_at_risk
         self.debug_mode = False
+        self.headline_weights = []
         self.api = REST(base_url=BASE_URL, key_id=API_KEY,
                         secret_key=API_SECRET)
+        self.setup_news_trigger(event_driven, news_feed, sentiment_change)
         
 
         
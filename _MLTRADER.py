@@ -6,9 +6,13 @@ import numpy as np
 import logging
 from datetime import timedelta
 from alpaca_trade_api import REST
-from finbert_utils import estimate_sentiment
+from finbert_utils import estimate_sentiment, ensemble
+from news_dedup import deduplicate_news, DedupStats
+from news_stream import NewsFeedFile, AlpacaNewsStream, NewsTrigger
 from lumibot.strategies import Strategy
 import math
+from array import array
+from memory_utils import log_rss
 
 colorama.init(autoreset=True)
 
@@ -25,8 +29,10 @@ ALPACA_CREDS = {
 }
 
 trades = []
-cash_history = []
+# Cash balances are stored as compact float32 values instead of a list of Python floats
+cash_history = array('f')
 date_history = []
+dedup_stats = DedupStats()
 
 logging.basicConfig(level=logging.INFO, filename='trading_bot.log', filemode='a',
                     format='%(asctime)s - %(levelname)s - %(message)s')
@@ -39,7 +45,8 @@ class _MLTRADER(Strategy):
     """
 
     
-    def initialize(self, symbol: str = "SPY" , cash_at_risk: float = .5):
+    def initialize(self, symbol: str = "SPY" , cash_at_risk: float = .5, event_driven: bool = False,
+                   news_feed: str = None, sentiment_change: float = .05):
         
         """
         Initialize the trading strategy with essential parameters and settings.
@@ -52,6 +59,11 @@ class _MLTRADER(Strategy):
         Args:
             symbol (str): The trading symbol.
             cash_at_risk (float): The proportion of cash to risk on each trade (default is 0.5 or 50%).
+            event_driven (bool): Wake on incoming news instead of once every 24 hours (default is False).
+            news_feed (str): Path of a local news feed file to tail in event-driven mode.
+                             When not set, Alpaca's real-time news stream is used.
+            sentiment_change (float): The change in sentiment probability that triggers the trading logic
+                                      in event-driven mode (default is 0.05).
             
         >>> MLTRADER().backtest(
         >>> YahooBacktesting,
@@ -66,10 +78,30 @@ class _MLTRADER(Strategy):
         self.last_trade = None
         self.cash_at_risk = cash_at_risk
         self.debug_mode = False
+        self.headline_weights = []
         self.api = REST(base_url=BASE_URL, key_id=API_KEY,
                         secret_key=API_SECRET)
-        
-        
+        self.setup_news_trigger(event_driven, news_feed, sentiment_change)
+
+    def setup_news_trigger(self, event_driven: bool, news_feed: str = None, sentiment_change: float = .05):
+        """
+        Switch the strategy between daily polling and event-driven news handling.
+
+            - In event-driven mode the strategy wakes every minute, but only scores headlines that
+              arrived since the last wake-up and only trades when the aggregate sentiment moved.
+            - Headlines come from a local news feed file when `news_feed` is set, or from Alpaca's news stream.
+
+        Args:
+            event_driven (bool): Whether to enable event-driven mode.
+            news_feed (str): Path of a local news feed file to tail.
+            sentiment_change (float): The change in sentiment probability that triggers the trading logic.
+        """
+        self.news_trigger = None
+        if event_driven:
+            source = NewsFeedFile(news_feed, self.symbol) if news_feed else AlpacaNewsStream(self.symbol)
+            self.news_trigger = NewsTrigger(source, min_change=sentiment_change, stats=dedup_stats)
+            self.sleeptime = "1M"
+
 
     def position_sizing(self):
         """
@@ -119,9 +151,11 @@ class _MLTRADER(Strategy):
     def get_sentiment(self):
         """
         Analyze recent news sentiment and return the sentiment probability and type.
+        In event-driven mode the running sentiment kept by the news trigger is returned instead.
 
             - Fetches news articles for the trading symbol from the past three days.
             - Extracts headlines from the news articles.
+            - Collapses repeated and near-duplicate headlines so each story is scored once.
             - Uses a sentiment analysis model to estimate the sentiment and its probability.
             - Logs the sentiment and probability for review.
 
@@ -130,13 +164,20 @@ class _MLTRADER(Strategy):
                 - probability (float): The probability score indicating the strength of the sentiment.
                 - sentiment (str): The sentiment type (e.g., 'positive', 'negative').
         """
+        if self.news_trigger is not None:
+            probability, sentiment = self.news_trigger.probability, self.news_trigger.sentiment
+            self.log(f"Sentiment: {sentiment}, Probability: {probability}")
+            return probability, sentiment
+
         today, three_days_prior = self.get_dates()
         news = self.api.get_news(symbol=self.symbol,
                                  start=three_days_prior,
                                  end=today)
 
-        news = [ev.__dict__["_raw"]["headline"] for ev in news]
-        probability, sentiment = estimate_sentiment(news)
+        news = [(ev.__dict__["_raw"].get("id"), ev.__dict__["_raw"]["headline"]) for ev in news]
+        headlines, self.headline_weights = deduplicate_news(news)
+        dedup_stats.record(len(news), len(headlines))
+        probability, sentiment = estimate_sentiment(headlines)
         self.log(f"Sentiment: {sentiment}, Probability: {probability}")
         return probability, sentiment
 
@@ -325,7 +366,14 @@ class _MLTRADER(Strategy):
                     - Record the trade as 'sell' and append it to the trades list.
                     - Send an alert about the 'sell' action.
             - Append the current cash balance and date to their respective histories for performance tracking.
+            - In event-driven mode the iteration only records the balance unless new headlines moved the sentiment.
         """
+        if self.news_trigger is not None and not self.news_trigger.poll(self.get_datetime()):
+            # Keep recording the balance so the drawdown and performance plot see every wake-up
+            cash_history.append(self.get_cash())
+            date_history.append(self.get_datetime())
+            return
+
         cash, last_price, quantity = self.position_sizing()
         probability, sentiment = self.get_sentiment()
         
@@ -411,6 +459,9 @@ class _MLTRADER(Strategy):
             - Calculates the Maximum Drawdown, indicating the largest peak-to-trough decline.
             - Determines the Win Rate, the proportion of profitable trades.
             - Logs the calculated metrics or indicates if no trades were executed.
+            - Logs how many headlines were skipped by news deduplication.
+            - Logs the latency of every sentiment model.
+            - Logs the resident memory of the process.
 
         """
 
@@ -433,6 +484,9 @@ class _MLTRADER(Strategy):
             self.log(f"Win Rate: {win_rate}")
         else:
             self.log("No trades executed, unable to calculate performance metrics.")
+        self.log(f"News Deduplication: {dedup_stats}")
+        self.log(f"Sentiment Models: {ensemble.latency_report()}")
+        log_rss('after backtest')
             
 
      
@@ -448,8 +502,9 @@ class _MLTRADER(Strategy):
 
         """
         if len(cash_history) > 1:
-            cum_max = np.maximum.accumulate(cash_history)
-            drawdown = (cash_history - cum_max) / cum_max
+            cash = np.frombuffer(cash_history, dtype=np.float32)
+            cum_max = np.maximum.accumulate(cash)
+            drawdown = (cash - cum_max) / cum_max
             max_drawdown = np.min(drawdown)
             return max_drawdown
         return 0
\ No newline at end of file
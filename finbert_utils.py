@@ -1,13 +1,195 @@
+import os
+import time
+import logging
 import torch
 from typing import Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 
-device = "cuda:0" if torch.cuda.is_available() else "cpu"
+load_dotenv()
 
-tokenizer = AutoTokenizer.from_pretrained("ProsusAI/finbert")
-model = AutoModelForSequenceClassification.from_pretrained("ProsusAI/finbert").to(device)
+device = "cuda:0" if torch.cuda.is_available() else "cpu"
 labels = ["positive", "negative", "neutral"]
 
+# Comma-separated list of model checkpoints with optional weights, e.g. "ProsusAI/finbert:1.0,./models/distil-fin:0.5"
+DEFAULT_SENTIMENT_MODEL = 'ProsusAI/finbert'
+SENTIMENT_MODELS = os.getenv('SENTIMENT_MODELS', DEFAULT_SENTIMENT_MODEL)
+SENTIMENT_CACHE_SIZE = int(os.getenv('SENTIMENT_CACHE_SIZE', 10000))
+
+def parse_model_specs(specs: str) -> list:
+    """
+    Parse the SENTIMENT_MODELS setting into `(checkpoint, weight)` pairs.
+    A weight is separated from the checkpoint by the last ':' and defaults to 1.0.
+    """
+    models = []
+    for spec in specs.split(','):
+        spec = spec.strip()
+        if not spec:
+            continue
+        checkpoint, _, weight = spec.rpartition(':')
+        try:
+            weight = float(weight)
+        except ValueError:
+            checkpoint, weight = spec, 1.0
+        if checkpoint.strip(':'):
+            models.append((checkpoint, weight))
+    return models
+
+class SentimentModel:
+    """
+    One checkpoint of the ensemble with its per-headline result cache and latency counters.
+    """
+
+    def __init__(self, checkpoint: str, weight: float, tokenizer):
+        self.checkpoint = checkpoint
+        self.weight = weight
+        self.tokenizer = tokenizer
+        self.model = AutoModelForSequenceClassification.from_pretrained(checkpoint).to(device)
+        # The model is only used for inference, so it is loaded once as read-only. Worker processes forked after
+        # import share these pages copy-on-write instead of holding their own copy.
+        self.model.eval()
+        self.model.requires_grad_(False)
+        self.order = self._label_order()
+        self.cache = OrderedDict()
+        self.calls = 0
+        self.headlines = 0
+        self.seconds = 0.0
+
+    def _label_order(self) -> list:
+        """
+        Map the model's output columns onto `labels` so that every model's logits line up.
+        """
+        id2label = {int(i): label.lower() for i, label in self.model.config.id2label.items()}
+        if set(id2label.values()) != set(labels):
+            logging.error(f"{self.checkpoint} labels {list(id2label.values())} do not match {labels}, "
+                          f"assuming they are in the same order")
+            return list(range(len(labels)))
+        index = {label: i for i, label in id2label.items()}
+        return [index[label] for label in labels]
+
+    def forward(self, tokens, headlines: list):
+        """
+        Score tokenized headlines, add their logits to the cache and return them keyed by headline.
+        """
+        started = time.perf_counter()
+        with torch.inference_mode():
+            result = self.model(tokens["input_ids"], attention_mask=tokens["attention_mask"])["logits"]
+        result = dict(zip(headlines, result[:, self.order].float().cpu()))
+        self.cache.update(result)
+        while len(self.cache) > SENTIMENT_CACHE_SIZE:
+            self.cache.popitem(last=False)
+        self.seconds += time.perf_counter() - started
+        self.calls += 1
+        self.headlines += len(headlines)
+        return result
+
+    def __str__(self):
+        per_headline = self.seconds / self.headlines * 1000 if self.headlines else 0.0
+        return (f"{self.checkpoint} (weight {self.weight}): {self.headlines} headlines in {self.calls} calls, "
+                f"{self.seconds:.2f}s total, {per_headline:.1f}ms per headline")
+
+class SentimentEnsemble:
+    """
+    Combine several sentiment models into one weighted score.
+
+        - Models that share a tokenizer family (same tokenizer class and vocabulary) share one
+          tokenizer, so each batch of headlines is tokenized once per family.
+        - Each model caches its logits per headline, so only unseen headlines are run through the model.
+        - Models run concurrently in a thread pool and their logits are combined with the configured weights.
+    """
+
+    def __init__(self, specs: list):
+        if not specs:
+            raise ValueError("A sentiment ensemble needs at least one model")
+        families = {}
+        self.models = []
+        for checkpoint, weight in specs:
+            tokenizer = AutoTokenizer.from_pretrained(checkpoint)
+            family = (type(tokenizer).__name__, hash(frozenset(tokenizer.get_vocab().items())))
+            tokenizer = families.setdefault(family, tokenizer)
+            self.models.append(SentimentModel(checkpoint, weight, tokenizer))
+        self.executor = ThreadPoolExecutor(max_workers=len(self.models)) if len(self.models) > 1 else None
+
+    def score(self, news: list) -> torch.Tensor:
+        """
+        Return the weighted sum of every model's summed logits for a list of headlines.
+        """
+        jobs = []
+        tokenized = {}
+        # Logits are gathered before any model runs, since scoring new headlines can evict cached ones
+        scores = []
+        for member in self.models:
+            found = {}
+            for headline in news:
+                if headline in member.cache:
+                    member.cache.move_to_end(headline)
+                    found[headline] = member.cache[headline]
+            scores.append(found)
+            missing = list(dict.fromkeys(headline for headline in news if headline not in found))
+            if not missing:
+                continue
+            key = (id(member.tokenizer), tuple(missing))
+            if key not in tokenized:
+                tokenized[key] = member.tokenizer(missing, return_tensors="pt", padding=True).to(device)
+            jobs.append((scores[-1], member, tokenized[key], missing))
+
+        if self.executor is None:
+            for found, member, tokens, missing in jobs:
+                found.update(member.forward(tokens, missing))
+        else:
+            futures = [(found, self.executor.submit(member.forward, tokens, missing))
+                       for found, member, tokens, missing in jobs]
+            for found, future in futures:
+                found.update(future.result())
+
+        total = torch.zeros(len(labels))
+        for member, found in zip(self.models, scores):
+            total += member.weight * torch.stack([found[headline] for headline in news]).sum(0)
+        return total
+
+    def latency_report(self) -> str:
+        return "; ".join(str(member) for member in self.models)
+
+model_specs = parse_model_specs(SENTIMENT_MODELS)
+if not model_specs:
+    logging.error(f"SENTIMENT_MODELS={SENTIMENT_MODELS!r} lists no models, using {DEFAULT_SENTIMENT_MODEL}")
+    model_specs = [(DEFAULT_SENTIMENT_MODEL, 1.0)]
+ensemble = SentimentEnsemble(model_specs)
+tokenizer = ensemble.models[0].tokenizer
+model = ensemble.models[0].model
+
+def score_headlines(news: list) -> torch.Tensor:
+    """
+    Run the configured models over a list of headlines and return their summed logits.
+
+    Summed logits can be added together across calls, which lets callers score only
+    the headlines they have not seen before and keep a running total.
+
+    Args:
+        news (List[str]): A list of news articles as strings.
+
+    Returns:
+        torch.Tensor: The logits of every headline summed into a single vector ordered like `labels`.
+    """
+    return ensemble.score(news)
+
+def sentiment_from_logits(logits: torch.Tensor) -> Tuple[float, str]:
+    """
+    Convert summed logits into the most likely sentiment and its probability.
+
+    Args:
+        logits (torch.Tensor): Summed logits ordered like `labels`.
+
+    Returns:
+        Tuple[float, str]: The probability of the most likely sentiment and its label.
+    """
+    result = torch.nn.functional.softmax(logits, dim=-1)
+    probability = result[torch.argmax(result)].item()
+    sentiment = labels[torch.argmax(result)]
+    return probability, sentiment
+
 def estimate_sentiment(news: list) -> Tuple[float, str]:
     """
     Estimates the sentiment of a list of news articles.
@@ -21,21 +203,17 @@ def estimate_sentiment(news: list) -> Tuple[float, str]:
                            and the second element is the predicted sentiment label.
     """
     if news:
-        tokens = tokenizer(news, return_tensors="pt", padding=True).to(device)
-        result = model(tokens["input_ids"], attention_mask=tokens["attention_mask"])["logits"]
-        result = torch.nn.functional.softmax(torch.sum(result, 0), dim=-1)
-        probability = result[torch.argmax(result)].item()
-        sentiment = labels[torch.argmax(result)]
-        return probability, sentiment
+        return sentiment_from_logits(score_headlines(news))
     else:
         return 0, labels[-1], "No sentiment found"
 
 if __name__ == "__main__":
     tensor, sentiment = estimate_sentiment(['the market repsonded negatively to the news!', 'traders were displeased to the market!'])
     print(tensor, sentiment)
+    print(ensemble.latency_report())
     cuda_available = None
     if torch.cuda.is_available():
         cuda_available = "is"
     elif not torch.cuda.is_available():
         cuda_available = "is not"
-    print(f"CUDA {cuda_available} available")
\ No newline at end of file
+    print(f"CUDA {cuda_available} available")
@@ -0,0 +1,169 @@
+import os
+import time
+import logging
+import threading
+import multiprocessing
+from collections import deque
+import psutil
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Total memory all backtest processes on this host may use, and the memory a single job adds on top of the
+# model shared with the parent process
+MEMORY_BUDGET_MB = float(os.getenv('MEMORY_BUDGET_MB', 0))
+JOB_MEMORY_MB = float(os.getenv('JOB_MEMORY_MB', 800))
+MAX_QUEUED_JOBS = int(os.getenv('MAX_QUEUED_JOBS', 8))
+
+
+def get_rss_mb(pid: int = None) -> float:
+    """
+    Return the resident set size of a process in megabytes.
+
+    Args:
+        pid (int): The process id to inspect (default is the current process).
+
+    Returns:
+        float: The resident memory of the process in MB, or 0 if it has already exited.
+    """
+    try:
+        return psutil.Process(pid).memory_info().rss / (1024 * 1024)
+    except psutil.NoSuchProcess:
+        return 0.0
+
+
+def get_uss_mb(pid: int = None) -> float:
+    """
+    Return the unique set size of a process in megabytes.
+
+    Pages shared copy-on-write with the parent, such as the preloaded FinBERT weights, are not included,
+    so the shared model is not counted again for every forked worker.
+
+    Args:
+        pid (int): The process id to inspect (default is the current process).
+
+    Returns:
+        float: The memory only this process holds in MB, or 0 if it has already exited.
+    """
+    try:
+        return psutil.Process(pid).memory_full_info().uss / (1024 * 1024)
+    except psutil.NoSuchProcess:
+        return 0.0
+    except psutil.AccessDenied:
+        return get_rss_mb(pid)
+
+
+def log_rss(label: str = ''):
+    """
+    Log and print the resident memory of the current process.
+
+    Args:
+        label (str): A short description of where the measurement was taken.
+    """
+    label = f" {label}" if label else ''
+    message = f"[pid {os.getpid()}] RSS{label}: {get_rss_mb():.1f} MB"
+    logging.info(message)
+    print(message)
+
+
+def _process_context():
+    """
+    Prefer forked workers so the FinBERT weights loaded by the parent are shared copy-on-write.
+    Platforms without fork (Windows) fall back to the default start method.
+    """
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+
+class MemoryBudget:
+    """
+    Admit backtest processes only while the host stays inside a configured memory budget.
+
+        - Jobs that fit are started immediately in a worker process.
+        - Jobs that would exceed the budget are queued and started once memory frees up.
+        - Jobs are refused outright when the queue is already full, or when they do not fit even
+          with no other job running, since waiting would never free enough memory.
+
+    A budget of 0 disables the check and every job is started immediately.
+    """
+
+    def __init__(self, budget_mb: float = MEMORY_BUDGET_MB, job_mb: float = JOB_MEMORY_MB,
+                 max_queued: int = MAX_QUEUED_JOBS, poll_interval: float = 5.0):
+        self.budget_mb = budget_mb
+        self.job_mb = job_mb
+        self.max_queued = max_queued
+        self.poll_interval = poll_interval
+        self.running = []
+        self.queue = deque()
+        self.lock = threading.Lock()
+        self.context = _process_context()
+        self._worker = None
+
+    def used_mb(self) -> float:
+        """
+        Return the memory used by this process and every running job.
+
+            - The parent, which holds the shared model, is counted at its full resident size.
+            - Each job only adds the memory it does not share with the parent.
+            - Jobs that are still warming up are counted at their expected footprint.
+        """
+        self.running = [p for p in self.running if p.is_alive()]
+        return get_rss_mb() + sum(max(get_uss_mb(p.pid), self.job_mb) for p in self.running)
+
+    def fits(self) -> bool:
+        """
+        Check whether one more job fits inside the budget.
+        """
+        if self.budget_mb <= 0:
+            return True
+        return self.used_mb() + self.job_mb <= self.budget_mb
+
+    def submit(self, target, args: tuple = ()) -> str:
+        """
+        Start, queue or refuse a job depending on the available memory.
+
+        Args:
+            target (callable): The function to run in a worker process.
+            args (tuple): The arguments passed to `target`.
+
+        Returns:
+            str: 'started', 'queued' or 'refused'.
+        """
+        with self.lock:
+            if not self.queue and self.fits():
+                self._start(target, args)
+                return 'started'
+            if not self.running and not self.fits():
+                logging.error(f"Memory budget of {self.budget_mb} MB is too small for a {self.job_mb} MB job "
+                              f"next to {get_rss_mb():.1f} MB used by this process, refusing job")
+                return 'refused'
+            if len(self.queue) >= self.max_queued:
+                logging.error(f"Memory budget of {self.budget_mb} MB exceeded and queue is full, refusing job")
+                return 'refused'
+            self.queue.append((target, args))
+            logging.info(f"Memory budget of {self.budget_mb} MB reached, job queued ({len(self.queue)} waiting)")
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._drain, daemon=True)
+                self._worker.start()
+            return 'queued'
+
+    def _start(self, target, args):
+        process = self.context.Process(target=target, args=args)
+        process.start()
+        self.running.append(process)
+
+    def _drain(self):
+        while True:
+            time.sleep(self.poll_interval)
+            with self.lock:
+                while self.queue and self.fits():
+                    self._start(*self.queue.popleft())
+                if self.queue and not self.running:
+                    # This process grew since the jobs were queued and they can no longer fit
+                    logging.error(f"Memory budget of {self.budget_mb} MB is too small for a {self.job_mb} MB job, "
+                                  f"dropping {len(self.queue)} queued jobs")
+                    self.queue.clear()
+                if not self.queue:
+                    self._worker = None
+                    return
@@ -0,0 +1,216 @@
+import re
+import zlib
+from typing import List, Tuple
+import numpy as np
+
+# Mersenne prime used for the MinHash permutations (a * x + b) mod p. With 31-bit operands the
+# products fit in 64 bits, so every permutation of a headline is computed in one NumPy operation.
+_MERSENNE_PRIME = (1 << 31) - 1
+
+
+def normalize_headline(text: str) -> str:
+    """
+    Normalize a headline so that syndicated copies compare equal.
+
+        - Lowercases the text and strips punctuation.
+        - Collapses repeated whitespace into a single space.
+
+    Args:
+        text (str): The raw headline.
+
+    Returns:
+        str: The normalized headline.
+    """
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def shingles(text: str, k: int = 5) -> set:
+    """
+    Break a normalized headline into a set of hashed character k-grams.
+
+    Args:
+        text (str): The normalized headline.
+        k (int): The length of each shingle (default is 5).
+
+    Returns:
+        set: The 32-bit hashes of every shingle in the headline.
+    """
+    if len(text) <= k:
+        return {zlib.crc32(text.encode("utf-8"))}
+    return {zlib.crc32(text[i:i + k].encode("utf-8")) for i in range(len(text) - k + 1)}
+
+
+class MinHashLSH:
+    """
+    MinHash signatures bucketed with locality sensitive hashing.
+
+    Headlines whose signatures collide in at least one band are returned as
+    near-duplicate candidates, which keeps clustering close to linear instead
+    of comparing every pair of headlines.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        if num_perm % bands != 0:
+            raise ValueError('num_perm must be divisible by bands')
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, _MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self.b = rng.integers(0, _MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self.buckets = [{} for _ in range(bands)]
+        self.signatures = {}
+
+    def signature(self, hashes: set) -> np.ndarray:
+        """
+        Compute the MinHash signature of a set of shingle hashes.
+        """
+        values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes)) % _MERSENNE_PRIME
+        return ((self.a * values + self.b) % _MERSENNE_PRIME).min(axis=1).astype(np.uint32)
+
+    def insert(self, key, hashes: set) -> set:
+        """
+        Add a headline to the index and return the keys it collides with.
+
+        Args:
+            key: Any hashable key identifying the headline.
+            hashes (set): The shingle hashes of the headline.
+
+        Returns:
+            set: Keys of previously inserted headlines that share a band.
+        """
+        sig = self.signature(hashes)
+        self.signatures[key] = sig
+        candidates = set()
+        for band in range(self.bands):
+            band_key = sig[band * self.rows:(band + 1) * self.rows].tobytes()
+            bucket = self.buckets[band].setdefault(band_key, [])
+            candidates.update(bucket)
+            bucket.append(key)
+        return candidates
+
+    def remove(self, key):
+        """
+        Remove a headline from the index.
+        """
+        sig = self.signatures.pop(key, None)
+        if sig is None:
+            return
+        for band in range(self.bands):
+            band_key = sig[band * self.rows:(band + 1) * self.rows].tobytes()
+            bucket = self.buckets[band].get(band_key)
+            if bucket is not None:
+                bucket.remove(key)
+                if not bucket:
+                    del self.buckets[band][band_key]
+
+    def similarity(self, first, second) -> float:
+        """
+        Estimate the Jaccard similarity of two inserted headlines.
+        """
+        a, b = self.signatures[first], self.signatures[second]
+        return np.count_nonzero(a == b) / self.num_perm
+
+
+def deduplicate_news(news: list, threshold: float = 0.7) -> Tuple[List[str], List[int]]:
+    """
+    Collapse exact and near-duplicate headlines before sentiment scoring.
+
+        - Drops repeated news ids and headlines whose normalized text is identical.
+        - Clusters the remaining headlines with MinHash/LSH and keeps the first headline of each cluster.
+        - Records how many headlines each representative stands in for.
+
+    Args:
+        news (list): A list of `(id, headline)` tuples in the order they were received.
+        threshold (float): The estimated Jaccard similarity at which two headlines are
+                           treated as the same story (default is 0.7).
+
+    Returns:
+        tuple: A tuple containing:
+            - headlines (List[str]): One representative headline per cluster.
+            - weights (List[int]): The number of headlines folded into each representative.
+    """
+    seen_ids = set()
+    exact = {}
+    lsh = MinHashLSH()
+    parent = []
+    headlines = []
+    weights = []
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for news_id, headline in news:
+        if news_id is not None:
+            if news_id in seen_ids:
+                continue
+            seen_ids.add(news_id)
+
+        normalized = normalize_headline(headline)
+        if normalized in exact:
+            weights[exact[normalized]] += 1
+            continue
+
+        index = len(headlines)
+        exact[normalized] = index
+        headlines.append(headline)
+        weights.append(1)
+        parent.append(index)
+
+        for other in lsh.insert(index, shingles(normalized)):
+            if lsh.similarity(index, other) >= threshold:
+                root, other_root = find(index), find(other)
+                if root != other_root:
+                    # The earliest headline always stays the representative
+                    parent[max(root, other_root)] = min(root, other_root)
+
+    clusters = {}
+    for index in range(len(headlines)):
+        root = find(index)
+        clusters[root] = clusters.get(root, 0) + weights[index]
+
+    representatives = sorted(clusters)
+    return [headlines[i] for i in representatives], [clusters[i] for i in representatives]
+
+
+class DedupStats:
+    """
+    Running totals of how much inference deduplication saved during a run.
+    """
+
+    def __init__(self):
+        self.headlines_received = 0
+        self.headlines_scored = 0
+
+    def record(self, received: int, scored: int):
+        self.headlines_received += received
+        self.headlines_scored += scored
+
+    @property
+    def headlines_skipped(self) -> int:
+        return self.headlines_received - self.headlines_scored
+
+    @property
+    def savings(self) -> float:
+        if self.headlines_received == 0:
+            return 0.0
+        return self.headlines_skipped / self.headlines_received
+
+    def __str__(self):
+        return (f"Headlines received: {self.headlines_received}, scored: {self.headlines_scored}, "
+                f"skipped: {self.headlines_skipped} ({self.savings:.1%} inference saved)")
+
+
+if __name__ == "__main__":
+    sample = [
+        (1, "Stocks rally as Fed signals rate cuts"),
+        (2, "Stocks rally as Fed signals rate cuts!"),
+        (3, "Stocks rally as the Fed signals rate cuts"),
+        (1, "Stocks rally as Fed signals rate cuts"),
+        (4, "Oil slides on weak demand outlook"),
+    ]
+    print(deduplicate_news(sample))
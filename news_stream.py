@@ -0,0 +1,212 @@
+import os
+import json
+import queue
+import asyncio
+import logging
+import threading
+from collections import deque
+from datetime import timedelta
+import torch
+from dotenv import load_dotenv
+from finbert_utils import score_headlines, sentiment_from_logits, labels
+from news_dedup import normalize_headline, shingles, MinHashLSH
+
+load_dotenv()
+
+API_KEY = os.getenv('API_KEY')
+API_SECRET = os.getenv('API_SECRET')
+BASE_URL = os.getenv('BASE_URL')
+
+
+class NewsFeedFile:
+    """
+    Tail a local news feed file as a stand-in for a live news stream.
+
+    The file holds one JSON object per line with at least a `headline`, and optionally an `id`
+    and a list of `symbols`. Only lines appended since the last poll are returned.
+    """
+
+    def __init__(self, path: str, symbol: str = None):
+        self.path = path
+        self.symbol = symbol
+        self.offset = 0
+
+    def poll(self) -> list:
+        """
+        Read the headlines appended to the feed since the last call.
+
+        Returns:
+            list: A list of `(id, headline)` tuples for the configured symbol.
+        """
+        if not os.path.exists(self.path):
+            return []
+        # Start over if the feed was truncated or rotated
+        if os.path.getsize(self.path) < self.offset:
+            self.offset = 0
+
+        news = []
+        with open(self.path, 'r', encoding='utf-8') as file:
+            file.seek(self.offset)
+            while True:
+                line = file.readline()
+                # A line without a newline is still being written, read it on the next poll
+                if not line or not line.endswith('\n'):
+                    break
+                self.offset = file.tell()
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:
+                    logging.error(f"Skipping malformed news feed line: {line.strip()}")
+                    continue
+                if not isinstance(item, dict) or not isinstance(item.get('headline'), str):
+                    logging.error(f"Skipping news feed line without a headline: {line.strip()}")
+                    continue
+                symbols = item.get('symbols')
+                if self.symbol and symbols and self.symbol not in symbols:
+                    continue
+                news.append((item.get('id'), item['headline']))
+        return news
+
+
+class AlpacaNewsStream:
+    """
+    Subscribe to Alpaca's real-time news stream for a symbol.
+
+    The websocket runs in a background thread and pushes headlines into a queue,
+    which `poll` drains without blocking the trading loop.
+    """
+
+    def __init__(self, symbol: str):
+        from alpaca_trade_api.common import URL
+        from alpaca_trade_api.stream import Stream
+
+        self.symbol = symbol
+        self.queue = queue.Queue()
+        self.stream = Stream(API_KEY, API_SECRET, base_url=URL(BASE_URL))
+        self.stream.subscribe_news(self._on_news, symbol)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    async def _on_news(self, news):
+        self.queue.put((news.id, news.headline))
+
+    def _run(self):
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        self.stream.run()
+
+    def poll(self) -> list:
+        """
+        Return every headline received since the last call.
+
+        Returns:
+            list: A list of `(id, headline)` tuples.
+        """
+        news = []
+        while True:
+            try:
+                news.append(self.queue.get_nowait())
+            except queue.Empty:
+                return news
+
+
+class NewsTrigger:
+    """
+    Score headlines as they arrive and signal when the aggregate sentiment moves.
+
+        - Only headlines that have not been seen before are sent to the model.
+        - Each headline's logits are kept for `window` and then expire, matching the
+          three day news window used by the polling strategy. The duplicate index expires with them.
+        - `poll` returns True only when the sentiment label flips or its probability
+          moves by at least `min_change`.
+    """
+
+    def __init__(self, source, window: timedelta = timedelta(days=3), min_change: float = 0.05,
+                 threshold: float = 0.7, stats=None):
+        self.source = source
+        self.window = window
+        self.min_change = min_change
+        self.threshold = threshold
+        self.stats = stats
+        self.scored = deque()
+        self.logits = torch.zeros(len(labels))
+        self.probability, self.sentiment = 0, labels[-1]
+        # Every id, normalized headline and LSH key seen, with the time it was seen, so they expire with the window
+        self.index = deque()
+        self.seen_ids = set()
+        self.seen_text = set()
+        self.lsh = MinHashLSH()
+        self.next_key = 0
+
+    def _is_new(self, news_id, headline, now) -> bool:
+        if news_id is not None:
+            if news_id in self.seen_ids:
+                return False
+            self.seen_ids.add(news_id)
+        normalized = normalize_headline(headline)
+        if normalized in self.seen_text:
+            if news_id is not None:
+                self.index.append((now, news_id, None, None))
+            return False
+        self.seen_text.add(normalized)
+        key = self.next_key
+        self.next_key += 1
+        self.index.append((now, news_id, normalized, key))
+        for other in self.lsh.insert(key, shingles(normalized)):
+            if self.lsh.similarity(key, other) >= self.threshold:
+                return False
+        return True
+
+    def _expire(self, now) -> bool:
+        """
+        Drop headlines and index entries that left the window, so returning stories are scored again.
+
+        Returns:
+            bool: True if any scored headlines expired.
+        """
+        while self.index and now - self.index[0][0] > self.window:
+            _, news_id, normalized, key = self.index.popleft()
+            self.seen_ids.discard(news_id)
+            if normalized is not None:
+                self.seen_text.discard(normalized)
+                self.lsh.remove(key)
+
+        expired = False
+        while self.scored and now - self.scored[0][0] > self.window:
+            self.logits = self.logits - self.scored.popleft()[1]
+            expired = True
+        if not self.scored:
+            self.logits = torch.zeros(len(labels))
+        return expired
+
+    def poll(self, now) -> bool:
+        """
+        Pull new headlines from the source and update the running sentiment.
+
+        Args:
+            now (datetime): The current strategy time, used to expire old headlines.
+
+        Returns:
+            bool: True if the aggregate sentiment changed enough to run the trading logic.
+        """
+        expired = self._expire(now)
+        news = self.source.poll()
+        headlines = [headline for news_id, headline in news if self._is_new(news_id, headline, now)]
+        if self.stats is not None:
+            self.stats.record(len(news), len(headlines))
+
+        if headlines:
+            logits = score_headlines(headlines).cpu()
+            self.scored.append((now, logits))
+            self.logits = self.logits + logits
+
+        if not headlines and not expired:
+            return False
+
+        if self.scored:
+            probability, sentiment = sentiment_from_logits(self.logits)
+        else:
+            probability, sentiment = 0, labels[-1]
+        changed = sentiment != self.sentiment or abs(probability - self.probability) >= self.min_change
+        if changed:
+            self.probability, self.sentiment = probability, sentiment
+        return changed
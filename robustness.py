@@ -0,0 +1,268 @@
+"""
+Monte Carlo / bootstrap robustness analysis of recorded backtests.
+
+For every run in logs/ the daily return series from `*_stats.csv` is resampled with replacement, and the
+sequence of closed trades from `*_trades.csv` is reshuffled. Confidence intervals are reported for total
+return, Sharpe ratio and maximum drawdown, so a run can be judged by more than its single observed Sharpe.
+Packed `.eats` run archives are read as well.
+
+Usage:
+    python robustness.py [--logs logs] [--resamples 5000] [--confidence 0.95] [--output robustness.csv]
+"""
+
+import os
+import glob
+import json
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from run_archive import ARCHIVE_EXTENSION, load_run
+
+TRADING_DAYS = 252
+# Resamples are evaluated in blocks to bound the memory of the (resamples x days) matrices
+BLOCK_SIZE = 1000
+
+
+def total_returns(returns: np.ndarray) -> np.ndarray:
+    """
+    Compound each row of a (resamples x periods) return matrix into a total return.
+    """
+    return np.prod(1 + returns, axis=-1) - 1
+
+
+def sharpe_ratios(returns: np.ndarray, risk_free_rate: float = 0.0) -> np.ndarray:
+    """
+    Annualized Sharpe ratio of each row of a daily return matrix.
+    """
+    std = np.std(returns, axis=-1)
+    excess = np.mean(returns, axis=-1) - risk_free_rate / TRADING_DAYS
+    # Flat return series (no trades) have no meaningful Sharpe ratio
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(std > 1e-12, excess / std * np.sqrt(TRADING_DAYS), np.nan)
+
+
+def _drawdowns(equity: np.ndarray) -> np.ndarray:
+    peaks = np.maximum.accumulate(equity, axis=-1)
+    # The starting balance counts as the first peak
+    np.maximum(peaks, 1, out=peaks)
+    np.divide(equity, peaks, out=peaks)
+    return np.min(peaks, axis=-1) - 1
+
+
+def max_drawdowns(returns: np.ndarray) -> np.ndarray:
+    """
+    Largest peak-to-trough decline of the equity curve built from each row of a return matrix.
+    """
+    return _drawdowns(np.cumprod(1 + returns, axis=-1))
+
+
+def trade_returns(trades: pd.DataFrame) -> np.ndarray:
+    """
+    Return of every closed trade, in the order the trades were closed.
+
+        - Only filled orders are used.
+        - Each fill that reduces a position realizes a return against the average entry price,
+          positive for a profitable long or short.
+    """
+    if trades is None or trades.empty or 'status' not in trades:
+        return np.empty(0)
+    fills = trades[trades['status'].astype(str) == 'fill']
+    positions = {}
+    returns = []
+    for symbol, side, price, quantity in zip(fills['symbol'].astype(str), fills['side'].astype(str),
+                                             fills['price'].astype(float), fills['filled_quantity'].astype(float)):
+        if not price > 0 or not quantity > 0:
+            continue
+        signed = quantity if side.startswith('buy') else -quantity
+        held, cost = positions.get(symbol, (0.0, 0.0))
+        if held == 0 or np.sign(held) == np.sign(signed):
+            # Opening or adding to a position updates the average entry price
+            total = held + signed
+            positions[symbol] = (total, (abs(held) * cost + quantity * price) / abs(total))
+            continue
+        returns.append(np.sign(held) * (price / cost - 1))
+        remaining = signed + held
+        if abs(signed) > abs(held):
+            # The fill flipped the position, the excess opens a new one at this price
+            positions[symbol] = (remaining, price)
+        else:
+            positions[symbol] = (remaining, cost if remaining != 0 else 0.0)
+    return np.asarray(returns, dtype=np.float64)
+
+
+def _interval(values: np.ndarray, confidence: float) -> tuple:
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return np.nan, np.nan
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(values, [tail, 100 - tail])
+    return low, high
+
+
+def trading_days(stats: pd.DataFrame) -> pd.DataFrame:
+    """
+    Drop the weekend rows lumibot writes to the stats, so returns are annualized over trading days only.
+
+    These rows always have a return of 0 and would otherwise bias the Sharpe ratio towards 0.
+    """
+    if 'datetime' not in stats:
+        return stats
+    dates = pd.to_datetime(stats['datetime'], errors='coerce', utc=True)
+    return stats[~(dates.dt.dayofweek >= 5)]
+
+
+def bootstrap(returns: np.ndarray, resamples: int, rng: np.random.Generator, risk_free_rate: float = 0.0) -> dict:
+    """
+    Resample a daily return series with replacement and compute the metrics of every resample.
+
+    Returns:
+        dict: Arrays of total return, Sharpe ratio and max drawdown, one value per resample.
+    """
+    results = {'total_return': [], 'sharpe': [], 'max_drawdown': []}
+    for start in range(0, resamples, BLOCK_SIZE):
+        size = min(BLOCK_SIZE, resamples - start)
+        sample = returns[rng.integers(0, returns.size, size=(size, returns.size), dtype=np.int32)]
+        results['sharpe'].append(sharpe_ratios(sample, risk_free_rate))
+        # The equity curve is shared by the total return and drawdown calculations
+        np.add(sample, 1, out=sample)
+        equity = np.cumprod(sample, axis=-1, out=sample)
+        results['total_return'].append(equity[:, -1] - 1)
+        results['max_drawdown'].append(_drawdowns(equity))
+    return {name: np.concatenate(values) for name, values in results.items()}
+
+
+def shuffle_trades(returns: np.ndarray, resamples: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Reshuffle the order of closed trades and return the max drawdown of every shuffled sequence.
+    """
+    drawdowns = []
+    for start in range(0, resamples, BLOCK_SIZE):
+        size = min(BLOCK_SIZE, resamples - start)
+        order = rng.random((size, returns.size)).argsort(axis=1)
+        drawdowns.append(max_drawdowns(returns[order]))
+    return np.concatenate(drawdowns)
+
+
+def load_frames(path: str) -> tuple:
+    """
+    Load the stats and trades of a run from its CSV files or from a packed run archive.
+
+    Args:
+        path (str): A `*_stats.csv` file or a run archive.
+
+    Returns:
+        tuple: The stats frame, the trades frame (or None) and the risk free rate of the run.
+    """
+    if path.endswith(ARCHIVE_EXTENSION):
+        archive = load_run(path)
+        trades = archive.trades if 'trades' in archive.layout else None
+        return archive.stats, trades, archive.settings.get('risk_free_rate') or 0.0
+
+    prefix = path[:-len('_stats.csv')]
+    stats = pd.read_csv(path)
+    trades = pd.read_csv(prefix + '_trades.csv') if os.path.exists(prefix + '_trades.csv') else None
+    risk_free_rate = 0.0
+    if os.path.exists(prefix + '_settings.json'):
+        with open(prefix + '_settings.json', 'r') as file:
+            risk_free_rate = json.load(file).get('risk_free_rate') or 0.0
+    return stats, trades, risk_free_rate
+
+
+def analyze_run(path: str, resamples: int = 5000, confidence: float = 0.95, seed: int = 0) -> dict:
+    """
+    Run the bootstrap and trade-order analysis for one backtest.
+
+    Args:
+        path (str): A `*_stats.csv` file or a run archive.
+        resamples (int): The number of resamples (default is 5000).
+        confidence (float): The width of the reported confidence intervals (default is 0.95).
+        seed (int): The seed of the random generator, so that results are reproducible.
+
+    Returns:
+        dict: The observed metrics and their confidence intervals.
+    """
+    stats, trades, risk_free_rate = load_frames(path)
+    stats = trading_days(stats)
+    if 'return' in stats:
+        returns = stats['return'].to_numpy(dtype=np.float64)
+    else:
+        returns = stats['portfolio_value'].pct_change().to_numpy(dtype=np.float64)
+    returns = returns[np.isfinite(returns)]
+
+    run = os.path.basename(path).replace('_stats.csv', '').replace(ARCHIVE_EXTENSION, '')
+    result = {'run': run, 'days': returns.size}
+    if returns.size < 2:
+        return result
+
+    rng = np.random.default_rng(seed)
+    observed = returns[np.newaxis, :]
+    result['total_return'] = total_returns(observed)[0]
+    result['sharpe'] = sharpe_ratios(observed, risk_free_rate)[0]
+    result['max_drawdown'] = max_drawdowns(observed)[0]
+    for name, values in bootstrap(returns, resamples, rng, risk_free_rate).items():
+        result[f'{name}_low'], result[f'{name}_high'] = _interval(values, confidence)
+
+    closed = trade_returns(trades)
+    result['trades'] = closed.size
+    if closed.size > 1:
+        low, high = _interval(shuffle_trades(closed, resamples, rng), confidence)
+        result['trade_order_drawdown_low'], result['trade_order_drawdown_high'] = low, high
+    return result
+
+
+def _analyze(args):
+    path, resamples, confidence, seed = args
+    try:
+        return analyze_run(path, resamples, confidence, seed)
+    except Exception as e:
+        logging.error(f"Error analyzing {path}: {str(e)}")
+        return {'run': os.path.basename(path), 'error': str(e)}
+
+
+def find_runs(logs_dir: str = 'logs') -> list:
+    """
+    Return the stats file or archive of every run in a logs directory.
+
+    `run_archive.py pack` keeps the CSV files unless asked to remove them, so a run can have both.
+    Each run is returned once, from its archive when there is one.
+    """
+    runs = {path[:-len('_stats.csv')]: path for path in glob.glob(os.path.join(logs_dir, '*_stats.csv'))}
+    for path in glob.glob(os.path.join(logs_dir, '*' + ARCHIVE_EXTENSION)):
+        runs[path[:-len(ARCHIVE_EXTENSION)]] = path
+    return sorted(runs.values())
+
+
+def analyze_runs(paths: list, resamples: int = 5000, confidence: float = 0.95, seed: int = 0,
+                 workers: int = None) -> pd.DataFrame:
+    """
+    Analyze many runs across a process pool.
+
+    Returns:
+        pd.DataFrame: One row per run with the observed metrics and their confidence intervals.
+    """
+    jobs = [(path, resamples, confidence, seed + i) for i, path in enumerate(paths)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunksize = max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 4))
+        results = list(executor.map(_analyze, jobs, chunksize=chunksize))
+    return pd.DataFrame(results)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Bootstrap confidence intervals for recorded backtests.')
+    parser.add_argument('--logs', default='logs')
+    parser.add_argument('--resamples', type=int, default=5000)
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default=None, help='Write the report to a CSV file')
+    args = parser.parse_args()
+
+    report = analyze_runs(find_runs(args.logs), args.resamples, args.confidence, args.seed, args.workers)
+    pd.set_option('display.width', 200)
+    pd.set_option('display.max_columns', None)
+    print(report.to_string(index=False))
+    if args.output:
+        report.to_csv(args.output, index=False)
+        print(f"Report saved to {args.output}")
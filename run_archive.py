@@ -0,0 +1,251 @@
+"""
+Compact per-run archives for backtest artifacts.
+
+A backtest normally leaves up to six files in logs/. `pack_run` stores the settings and the stats, trades
+and tearsheet tables of a run in a single `.eats` file:
+
+    - Tables are written as uncompressed Arrow IPC segments, so they can be memory-mapped and read zero-copy.
+    - Columns are typed (timestamps, floats, integers) and repeated strings such as strategy,
+      symbol, side and asset_type are dictionary-encoded.
+    - HTML tearsheets are not stored; `render_tearsheet` builds one from the archived stats on demand.
+    - The `_trades.html` plot is kept next to the archive, since it also plots benchmark prices
+      that are not part of the run's tables and cannot be rebuilt from them.
+
+Usage:
+    python run_archive.py pack [--logs logs] [--remove]
+    python run_archive.py tearsheet logs/MLTRADER_2024-07-30_10-07_lqqNSj.eats
+"""
+
+import os
+import glob
+import json
+import struct
+import logging
+import argparse
+import uuid
+from datetime import datetime
+import pandas as pd
+import pyarrow as pa
+
+MAGIC = b'EATSRUN1'
+ARCHIVE_EXTENSION = '.eats'
+TABLES = ('stats', 'trades', 'tearsheet')
+ALIGNMENT = 64
+
+
+def _to_arrow(frame: pd.DataFrame) -> pa.Table:
+    """
+    Convert a frame to an Arrow table with typed columns and dictionary-encoded strings.
+    """
+    columns = {}
+    for name in frame.columns:
+        column = frame[name]
+        if pd.api.types.is_numeric_dtype(column):
+            columns[name] = pa.array(column)
+            continue
+        converted = pd.to_datetime(column, errors='coerce', utc=True) if name in ('time', 'datetime') else None
+        if converted is not None and converted.notna().sum() == column.notna().sum():
+            columns[name] = pa.array(converted)
+        else:
+            columns[name] = pa.array(column.astype('string')).dictionary_encode()
+    return pa.table(columns)
+
+
+def _serialize(table: pa.Table) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def run_files(prefix: str) -> dict:
+    """
+    Return the artifact files that exist for a run, keyed by artifact name.
+
+    Args:
+        prefix (str): The path of the run without its suffix, e.g. 'logs/MLTRADER_2024-07-30_10-07_lqqNSj'.
+    """
+    files = {}
+    for name in ('settings.json', 'stats.csv', 'trades.csv', 'tearsheet.csv', 'tearsheet.html', 'trades.html'):
+        path = f"{prefix}_{name}"
+        if os.path.exists(path):
+            files[name] = path
+    return files
+
+
+def pack_run(prefix: str, remove: bool = False) -> str:
+    """
+    Pack the artifacts of one backtest run into a single compact archive.
+
+    Args:
+        prefix (str): The path of the run without its suffix, e.g. 'logs/MLTRADER_2024-07-30_10-07_lqqNSj'.
+        remove (bool): Delete the CSV, JSON and tearsheet files once the archive is written (default is False).
+                       The `_trades.html` plot is always kept.
+
+    Returns:
+        str: The path of the written archive.
+    """
+    files = run_files(prefix)
+    settings = {}
+    if 'settings.json' in files:
+        with open(files['settings.json'], 'r') as file:
+            settings = json.load(file)
+
+    segments = {}
+    for name in TABLES:
+        path = files.get(f"{name}.csv")
+        if path and os.path.getsize(path) > 0:
+            segments[name] = _serialize(_to_arrow(pd.read_csv(path)))
+
+    # Header: magic, header length, then a JSON header with the settings and the offset of every table
+    offset = 0
+    layout = {}
+    for name, data in segments.items():
+        layout[name] = [offset, len(data)]
+        offset += len(data) + (-len(data) % ALIGNMENT)
+    header = json.dumps({'settings': settings, 'tables': layout}).encode('utf-8')
+    header += b' ' * (-(len(MAGIC) + 8 + len(header)) % ALIGNMENT)
+
+    path = prefix + ARCHIVE_EXTENSION
+    with open(path, 'wb') as file:
+        file.write(MAGIC)
+        file.write(struct.pack('<Q', len(header)))
+        file.write(header)
+        for data in segments.values():
+            file.write(data)
+            file.write(b'\0' * (-len(data) % ALIGNMENT))
+
+    if remove:
+        for name, artifact in files.items():
+            if name != 'trades.html':
+                os.remove(artifact)
+    return path
+
+
+def find_runs(logs_dir: str = 'logs') -> list:
+    """
+    Return the prefix of every finished run in a logs directory that has not been archived yet.
+
+    Runs without a stats file have not finished (or failed), so there is nothing to archive yet.
+    """
+    prefixes = [path[:-len('_settings.json')] for path in glob.glob(os.path.join(logs_dir, '*_settings.json'))]
+    return sorted(prefix for prefix in prefixes
+                  if os.path.exists(prefix + '_stats.csv') and not os.path.exists(prefix + ARCHIVE_EXTENSION))
+
+
+def new_run_prefix(logs_dir: str = 'logs', name: str = 'MLTRADER') -> str:
+    """
+    Return a unique path prefix for the artifacts of a backtest that is about to start.
+
+    Passing the files from `backtest_files` to the backtest ties every artifact to this prefix, so the run
+    can be packed without touching the runs of other backtests writing to the same logs directory.
+    """
+    os.makedirs(logs_dir, exist_ok=True)
+    return os.path.join(logs_dir, f"{name}_{datetime.now():%Y-%m-%d_%H-%M}_{uuid.uuid4().hex[:8]}")
+
+
+def backtest_files(prefix: str) -> dict:
+    """
+    Return the artifact paths of a run as keyword arguments for `Strategy.backtest`.
+    """
+    return {
+        'settings_file': f"{prefix}_settings.json",
+        'stats_file': f"{prefix}_stats.csv",
+        'trades_file': f"{prefix}_trades.csv",
+        'tearsheet_file': f"{prefix}_tearsheet.html",
+        'plot_file_html': f"{prefix}_trades.html",
+    }
+
+
+class RunArchive:
+    """
+    Memory-mapped view of a packed run.
+
+    `table` returns Arrow tables that reference the mapped file directly. `frame` converts them to pandas
+    one block per column, so numeric columns without nulls still point into the mapped file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.buffer = pa.memory_map(path, 'r').read_buffer()
+        if self.buffer.slice(0, len(MAGIC)).to_pybytes() != MAGIC:
+            raise ValueError(f"{path} is not an EATS run archive")
+        header_length = struct.unpack('<Q', self.buffer.slice(len(MAGIC), 8).to_pybytes())[0]
+        start = len(MAGIC) + 8
+        header = json.loads(self.buffer.slice(start, header_length).to_pybytes())
+        self.settings = header['settings']
+        self.layout = header['tables']
+        self.data_offset = start + header_length
+
+    def table(self, name: str) -> pa.Table:
+        if name not in self.layout:
+            raise KeyError(f"{self.path} has no {name} table")
+        offset, length = self.layout[name]
+        segment = self.buffer.slice(self.data_offset + offset, length)
+        return pa.ipc.open_file(segment).read_all()
+
+    def frame(self, name: str) -> pd.DataFrame:
+        # Consolidating columns into shared blocks would copy them out of the mapped file
+        return self.table(name).to_pandas(split_blocks=True)
+
+    @property
+    def stats(self) -> pd.DataFrame:
+        return self.frame('stats')
+
+    @property
+    def trades(self) -> pd.DataFrame:
+        return self.frame('trades')
+
+
+def load_run(path: str) -> RunArchive:
+    """
+    Open a packed run archive.
+    """
+    return RunArchive(path)
+
+
+def render_tearsheet(path: str, output: str = None) -> str:
+    """
+    Render an HTML tearsheet from the stats stored in a run archive.
+
+    Args:
+        path (str): The path of the run archive.
+        output (str): Where to write the HTML file (default is next to the archive).
+
+    Returns:
+        str: The path of the rendered tearsheet.
+    """
+    import quantstats_lumi as qs
+
+    archive = load_run(path)
+    stats = archive.stats.set_index('datetime')
+    returns = stats['return'].fillna(0)
+    returns.index = returns.index.tz_localize(None)
+    output = output or path[:-len(ARCHIVE_EXTENSION)] + '_tearsheet.html'
+    qs.reports.html(returns, output=output, title=archive.settings.get('name', 'EATS MLTRADER'),
+                    rf=archive.settings.get('risk_free_rate', 0.0) or 0.0)
+    return output
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pack backtest artifacts into compact run archives.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    pack = commands.add_parser('pack', help='Pack every unarchived run in a logs directory')
+    pack.add_argument('--logs', default='logs')
+    pack.add_argument('--remove', action='store_true', help='Delete the original files after packing')
+    tearsheet = commands.add_parser('tearsheet', help='Render an HTML tearsheet from a run archive')
+    tearsheet.add_argument('archive')
+    tearsheet.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    if args.command == 'pack':
+        runs = find_runs(args.logs)
+        for prefix in runs:
+            try:
+                print(pack_run(prefix, remove=args.remove))
+            except Exception as e:
+                logging.error(f"Error packing {prefix}: {str(e)}")
+                print(f"Error packing {prefix}: {str(e)}")
+        print(f"Packed {len(runs)} runs")
+    elif args.command == 'tearsheet':
+        print(render_tearsheet(args.archive, args.output))
@@ -0,0 +1,212 @@
+import os
+import csv
+import time
+import logging
+import threading
+import urllib.request
+from dotenv import load_dotenv
+from yahooquery import Ticker
+
+load_dotenv()
+
+LISTING_FILE = os.getenv('TICKER_LISTING_FILE', os.path.join(os.path.dirname(__file__), 'static', 'data', 'listings.csv'))
+VALIDATION_TTL = float(os.getenv('TICKER_VALIDATION_TTL', 3600))
+REFRESH_INTERVAL = float(os.getenv('TICKER_REFRESH_INTERVAL', 300))
+
+# Every security traded on US exchanges (NASDAQ, NYSE, NYSE American, NYSE Arca, Cboe BZX, IEX)
+SYMBOL_DIRECTORY_URL = 'https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqtraded.txt'
+EXCHANGES = {'Q': 'NASDAQ', 'N': 'NYSE', 'A': 'NYSEAMERICAN', 'P': 'NYSEARCA', 'Z': 'BATS', 'V': 'IEX'}
+
+
+def normalize_symbol(symbol: str) -> str:
+    """
+    Normalize a ticker symbol the way Yahoo Finance writes it (e.g. 'brk.b' -> 'BRK-B').
+    """
+    return symbol.strip().upper().replace('.', '-')
+
+
+def parse_watchlist(text: str) -> list:
+    """
+    Split a comma-separated watchlist into unique, normalized symbols in their original order.
+
+    Args:
+        text (str): The watchlist as entered by the user, e.g. 'SPY, aapl,msft'.
+
+    Returns:
+        list: The normalized symbols.
+    """
+    symbols = []
+    for symbol in (text or '').split(','):
+        symbol = normalize_symbol(symbol)
+        if symbol and symbol not in symbols:
+            symbols.append(symbol)
+    return symbols
+
+
+def summary_is_valid(summary) -> bool:
+    """
+    Check a yahooquery summary entry. Yahoo returns a dict for known symbols and an error string otherwise.
+    """
+    return isinstance(summary, dict)
+
+
+def summary_is_unknown(summary) -> bool:
+    """
+    Check whether a yahooquery summary entry says the symbol does not exist, as opposed to a failed request.
+    """
+    return isinstance(summary, str) and summary.startswith(('No fundamentals data found', 'Quote not found for ticker symbol'))
+
+
+class TickerIndex:
+    """
+    In-memory index of known ticker symbols used to validate requests without network calls.
+
+        - The index is loaded from a bundled listing file and reloaded when the file changes.
+        - Symbols missing from the listing are reported as pending and looked up on Yahoo Finance
+          in a background thread, so a retry a few seconds later can accept them without blocking.
+        - Symbols Yahoo Finance does not know are cached as invalid for `ttl` seconds.
+    """
+
+    def __init__(self, path: str = LISTING_FILE, ttl: float = VALIDATION_TTL,
+                 refresh_interval: float = REFRESH_INTERVAL):
+        self.path = path
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self.symbols = {}
+        self.cache = {}
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.mtime = None
+        self._worker = None
+        self.load()
+
+    def load(self):
+        """
+        Load the listing file into the index if it changed since the last load.
+        """
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            logging.error(f"Ticker listing file {self.path} not found")
+            return
+        if mtime == self.mtime:
+            return
+        with open(self.path, newline='', encoding='utf-8') as file:
+            listings = {normalize_symbol(row['symbol']): row for row in csv.DictReader(file)}
+        with self.lock:
+            # Keep symbols discovered through Yahoo Finance that are not in the listing file
+            self.symbols = {**self.symbols, **listings}
+            self.cache.clear()
+            self.mtime = mtime
+        logging.info(f"Loaded {len(listings)} ticker symbols from {self.path}")
+
+    def validate(self, symbols: list) -> tuple:
+        """
+        Split symbols into valid, pending and invalid ones using in-memory lookups only.
+
+        Args:
+            symbols (list): Normalized ticker symbols.
+
+        Returns:
+            tuple: A tuple containing:
+                - valid (list): Symbols found in the index.
+                - pending (list): Symbols not in the index yet that are being looked up on Yahoo Finance.
+                - invalid (list): Symbols Yahoo Finance confirmed it does not know.
+        """
+        now = time.monotonic()
+        valid, pending, invalid, unknown = [], [], [], []
+        with self.lock:
+            for symbol in symbols:
+                if symbol in self.symbols:
+                    valid.append(symbol)
+                    continue
+                cached = self.cache.get(symbol)
+                if cached is not None and cached > now:
+                    invalid.append(symbol)
+                    continue
+                pending.append(symbol)
+                if symbol not in self.pending:
+                    unknown.append(symbol)
+            self.pending.update(unknown)
+        if unknown:
+            threading.Thread(target=self._lookup, args=(unknown,), daemon=True).start()
+        return valid, pending, invalid
+
+    def _lookup(self, symbols: list):
+        """
+        Look up symbols missing from the listing on Yahoo Finance in a single batch request.
+
+        Symbols Yahoo answers for are added to the index, symbols it reports as unknown are cached as
+        invalid for `ttl` seconds, and symbols that could not be checked are looked up again next time.
+        """
+        try:
+            summaries = Ticker(symbols).summary_detail
+        except Exception as e:
+            logging.error(f"Error looking up tickers {symbols}: {str(e)}")
+            summaries = {}
+        expires = time.monotonic() + self.ttl
+        with self.lock:
+            for symbol in symbols:
+                self.pending.discard(symbol)
+                summary = summaries.get(symbol)
+                if summary_is_valid(summary):
+                    self.symbols[symbol] = {'symbol': symbol}
+                    self.cache.pop(symbol, None)
+                elif summary_is_unknown(summary):
+                    self.cache[symbol] = expires
+
+    def start_refresh(self):
+        """
+        Reload the listing file in a background thread every `refresh_interval` seconds.
+        """
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._refresh, daemon=True)
+            self._worker.start()
+
+    def _refresh(self):
+        while True:
+            time.sleep(self.refresh_interval)
+            try:
+                self.load()
+            except Exception as e:
+                logging.error(f"Error refreshing ticker listing: {str(e)}")
+
+
+def build_listing(path: str = LISTING_FILE, url: str = SYMBOL_DIRECTORY_URL) -> int:
+    """
+    Download the NASDAQ Trader symbol directory and write it as a listing file.
+
+        - Test issues and symbols Yahoo Finance cannot quote (e.g. preferred shares with '$') are skipped.
+        - Symbols are written in Yahoo Finance form, e.g. 'BRK.B' becomes 'BRK-B'.
+
+    Args:
+        path (str): Where to write the listing file (default is the bundled listing).
+        url (str): The pipe-delimited symbol directory to download.
+
+    Returns:
+        int: The number of symbols written.
+    """
+    with urllib.request.urlopen(url, timeout=60) as response:
+        lines = response.read().decode('utf-8').splitlines()
+    rows = csv.DictReader(lines, delimiter='|')
+    listings = {}
+    for row in rows:
+        symbol = row.get('Symbol') or ''
+        # The last line of the directory is a file creation timestamp, not a listing
+        if not symbol or row.get('Test Issue') == 'Y' or '$' in symbol or symbol.startswith('File Creation Time'):
+            continue
+        symbol = normalize_symbol(symbol)
+        listings[symbol] = [symbol, row.get('Security Name', ''), EXCHANGES.get(row.get('Listing Exchange'), '')]
+
+    temporary = path + '.tmp'
+    with open(temporary, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(['symbol', 'name', 'exchange'])
+        writer.writerows(listings[symbol] for symbol in sorted(listings))
+    # Replace the listing in one step so a running TickerIndex never reads a half-written file
+    os.replace(temporary, path)
+    return len(listings)
+
+
+if __name__ == '__main__':
+    print(f"Wrote {build_listing()} symbols to {LISTING_FILE}")
@@ -1,13 +1,13 @@
 from flask import Flask, request, render_template, redirect, url_for
-import sys
 import os
 from datetime import datetime
 from lumibot.brokers import Alpaca
 from dotenv import load_dotenv
 from lumibot.backtesting import YahooDataBacktesting    
 from MLTRADER import MLTRADER
-from yahooquery import Ticker
-from multiprocessing import Process
+from ticker_index import TickerIndex, parse_watchlist
+from memory_utils import MemoryBudget, log_rss
+from run_archive import new_run_prefix, backtest_files, pack_run
 
 dotenv_envirorment = load_dotenv()
 
@@ -26,44 +26,49 @@ ALPACA_CREDS = {
 start_date = datetime(2007, 3, 1)
 end_date = datetime(2024, 9, 15)
 
+# Store each run as one compact archive in logs/ (plus its trades plot) instead of CSV and HTML files
+COMPACT_RUN_ARTIFACTS = os.getenv('COMPACT_RUN_ARTIFACTS', 'False').lower() == 'true'
+
 broker = Alpaca(ALPACA_CREDS)
 
+# Limits how many backtests run side by side, see MEMORY_BUDGET_MB in the README
+job_budget = MemoryBudget()
+
+ticker_index = TickerIndex()
+ticker_index.start_refresh()
+
 def run_backtest(ticker):
+    log_rss(f'starting backtest for {ticker}')
     strategy = MLTRADER(name='mlstrat', broker=broker, budget= 1,
                         parameters={'symbol': ticker,
                                     "cash_at_risk": .5})
 
     strategy.initialize(symbol=ticker)
 
+    prefix = new_run_prefix('logs', f'MLTRADER_{ticker}')
     strategy.backtest(
         YahooDataBacktesting,
         start_date,
         end_date,
         benchmark_asset=ticker,
         parameters={'symbol': ticker,
-                    "cash_at_risk": .5}
+                    "cash_at_risk": .5},
+        save_tearsheet=not COMPACT_RUN_ARTIFACTS,
+        show_tearsheet=not COMPACT_RUN_ARTIFACTS,
+        **backtest_files(prefix)
     )
+    # Only this run's files are packed and removed, other backtests may be writing to logs/ at the same time
+    if COMPACT_RUN_ARTIFACTS and os.path.exists(prefix + '_stats.csv'):
+        archive = pack_run(prefix, remove=True)
+        print(f'Run artifacts saved to {archive}, render the tearsheet with `python run_archive.py tearsheet {archive}`')
 
 
     print('Trading completed successfully! Your results are loading...')
     strategy.get_results()
     strategy.load_gui()
     strategy.log_cash_and_position_details()
+    log_rss(f'finished backtest for {ticker}')
     
-def validate_ticker(summary):
-    if not isinstance(summary, dict):
-        try:
-            if (summary.startswith('No fundamentals data found ')) == True:
-                print('This ticker is not available in the yahoo database')
-                sys.exit(1)
-            elif (summary.startswith('Quote not found for ticker symbol')) == True:
-                print('This quote is not found in the yahoo database')
-                sys.exit(1)
-        except:
-            raise KeyError('String can not be used like this')
-    else:
-        print(summary)
-
 @app.route('/', methods=['GET', 'POST'])
 def home():
     if request.method == 'POST':
@@ -79,15 +84,23 @@ def home():
 @app.route('/ticker', methods=['GET', 'POST'])
 def index():
     if request.method == 'POST':
-        symbol = request.form.get('ticker')
-        ticker = Ticker(f"{symbol}")
-        if ticker:
-            # Start the backtest in a new process
-            summary = ticker.summary_detail[symbol]
-            validate_ticker(summary)
-            p = Process(target=run_backtest, args=(symbol,))
-            p.start()
-            return render_template('result.html', ticker=symbol)
+        symbols = parse_watchlist(request.form.get('ticker'))
+        if not symbols:
+            return render_template('ticker.html', error='Please enter at least one ticker symbol.')
+        valid, pending, invalid = ticker_index.validate(symbols)
+        if invalid:
+            return render_template('ticker.html', error=f"Unknown ticker symbol(s): {', '.join(invalid)}")
+        if pending:
+            return render_template('ticker.html', error=f"Checking {', '.join(pending)} with Yahoo Finance, "
+                                                        f"please retry in a few seconds.")
+        # Start a backtest for every symbol in a new process if the memory budget allows it
+        results = {'started': [], 'queued': [], 'refused': []}
+        for symbol in valid:
+            results[job_budget.submit(run_backtest, (symbol,))].append(symbol)
+        if not results['started'] and not results['queued']:
+            return render_template('ticker.html', error='Not enough memory to start a backtest (see MEMORY_BUDGET_MB in the README), please try again later.')
+        return render_template('result.html', ticker=', '.join(results['started'] + results['queued']),
+                               queued=', '.join(results['queued']), refused=', '.join(results['refused']))
     return render_template('ticker.html')
 
 if __name__ == '__main__':